@@ -0,0 +1,99 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Cython implementation of Gibbs sampling kernels from BayesNetwork.kernels. Arguments are the same as in pure Python
+kernels, all integer arrays are int64 and all float arrays are float64.
+"""
+
+
+cdef inline long long _sample_value(long long node, double uniform, const long long[::1] keys,
+                                    const long long[::1] cpt_offsets, const long long[::1] rows_offsets,
+                                    const double[::1] cpts, const long long[::1] cpts_values) noexcept nogil:
+    cdef long long row = cpt_offsets[node] + keys[node]
+    cdef long long low, high, middle
+
+    # Binary search for first cumulative probability greater than drawn number
+    low = rows_offsets[row]
+    high = rows_offsets[row + 1] - 1
+    if high < low:
+        return -1
+    while low < high:
+        middle = (low + high) // 2
+        if cpts[middle] > uniform:
+            high = middle
+        else:
+            low = middle + 1
+
+    return cpts_values[low]
+
+
+cdef inline void _set_value(long long node, long long value, const long long[::1] children_offsets,
+                            const long long[::1] children_ids, const long long[::1] children_strides,
+                            long long[::1] keys, long long[::1] values) noexcept nogil:
+    cdef long long difference = value - values[node]
+    cdef long long j
+
+    if difference != 0:
+        for j in range(children_offsets[node], children_offsets[node + 1]):
+            keys[children_ids[j]] += difference * children_strides[j]
+        values[node] = value
+
+
+def gibbs_kernel(const long long[::1] update_ids, const double[::1] uniforms, const long long[::1] children_offsets,
+                 const long long[::1] children_ids, const long long[::1] children_strides,
+                 const long long[::1] cpt_offsets, const long long[::1] rows_offsets, const double[::1] cpts,
+                 const long long[::1] cpts_values, long long[::1] keys, long long[::1] values,
+                 long long[:, ::1] counters):
+    """
+    Performs Gibbs sampling loop on integer encoded network. Values, keys and counters are updated in place. Returns
+    id of node, which has to be sampled from row missing in its conditional probability table, or -1.
+    """
+    cdef Py_ssize_t i
+    cdef long long node, value
+    cdef long long missing = -1
+
+    with nogil:
+        for i in range(update_ids.shape[0]):
+            node = update_ids[i]
+            value = _sample_value(node, uniforms[i], keys, cpt_offsets, rows_offsets, cpts, cpts_values)
+            if value < 0:
+                missing = node
+                break
+            _set_value(node, value, children_offsets, children_ids, children_strides, keys, values)
+            counters[node, value] += 1
+
+    return missing
+
+
+def gibbs_block_kernel(const long long[::1] groups_offsets, const long long[::1] groups_ids,
+                       const double[:, ::1] uniforms, const long long[::1] children_offsets,
+                       const long long[::1] children_ids, const long long[::1] children_strides,
+                       const long long[::1] cpt_offsets, const long long[::1] rows_offsets, const double[::1] cpts,
+                       const long long[::1] cpts_values, long long[::1] keys, long long[::1] values,
+                       long long[:, ::1] counters):
+    """
+    Performs block Gibbs sampling loop on integer encoded network. Nodes within group are resampled one after
+    another, which is equivalent to resampling them at once, as they are conditionally independent. Values, keys and
+    counters are updated in place. Returns id of node, which has to be sampled from row missing in its conditional
+    probability table, or -1.
+    """
+    cdef Py_ssize_t i, group, j
+    cdef long long node, value
+    cdef long long missing = -1
+
+    with nogil:
+        for i in range(uniforms.shape[0]):
+            for group in range(groups_offsets.shape[0] - 1):
+                for j in range(groups_offsets[group], groups_offsets[group + 1]):
+                    node = groups_ids[j]
+                    value = _sample_value(node, uniforms[i, j], keys, cpt_offsets, rows_offsets, cpts, cpts_values)
+                    if value < 0:
+                        missing = node
+                        break
+                    _set_value(node, value, children_offsets, children_ids, children_strides, keys, values)
+                    counters[node, value] += 1
+                if missing >= 0:
+                    break
+            if missing >= 0:
+                break
+
+    return missing
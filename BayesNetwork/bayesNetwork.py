@@ -1,7 +1,14 @@
-from random import choice as random_choice
+from itertools import product
+from multiprocessing import get_context
 from typing import List, Dict, Union
 
-from BayesNetwork.distributions import Distribution, ConditionalDistribution
+import numpy as np
+
+from BayesNetwork.distributions import Distribution, ConditionalDistribution, get_rng
+from BayesNetwork.kernels import gibbs_kernel, gibbs_block_kernel
+
+# Maximal number of random numbers drawn at once in Gibbs sampling, so memory used does not grow with iterations
+_CHUNK_SIZE = 2 ** 16
 
 
 class Node:
@@ -24,15 +31,30 @@ class Node:
         self.parents = {}
         # Used in conditional probability
         self.parents_order = []
+        # Parents nodes in parents_order, set in preprocess
+        self._parent_nodes_ordered = ()
+        # Numbers of parents values and keys in distribution of evidences packed with ids of parents values, where -1
+        # marks evidence missing in conditional probability table, set in preprocess
+        self._parents_cardinalities = ()
+        self._keys_map = []
 
         self.markov_blanket = {}
+        # Nodes in markov blanket, set in preprocess
+        self._markov_blanket_tuple = ()
         self.distribution = distribution
         self.name = name
+        # Dense integer ids of node and its parents, set when network is preprocessed
+        self.id = None
+        self.parents_ids = []
 
         self.is_dependent = isinstance(distribution, ConditionalDistribution)
-        self.counter = {}
+        # Occurrence counters indexed by value index, allocated in preprocess
+        self.counter = None
+        self._value_to_idx = {}
         self.evidence = None
         self.static_value = None
+        # Id of current value (evidence or static value) used in Gibbs sampling loop
+        self._value_id = None
 
     def add_parent(self, parent: 'Node') -> None:
         """
@@ -45,7 +67,7 @@ class Node:
         """
         assert isinstance(parent, Node), 'Given parent is not a Node'
         assert parent is not self, 'Cant add self as a parent'
-        assert isinstance(self.distribution, ConditionalDistribution), 'Cant add parents to independent distribution'
+        assert self.is_dependent, 'Cant add parents to independent distribution'
 
         if parent.name in self.children.keys():
             raise ValueError('Can`t add parent, because not is already a child')
@@ -109,13 +131,14 @@ class Node:
         """
         # Adding parents children to markov blanket (excluding node itself)
         for child in self.children.values():
-            for name, node in child.get_parents().items():
-                if name != self.name:
-                    self.markov_blanket[name] = node
+            self.markov_blanket.update(child.get_parents())
+        self.markov_blanket.pop(self.name, None)
+        self._markov_blanket_tuple = tuple(self.markov_blanket.values())
 
-        self.distribution.preprocess()
+        self._parent_nodes_ordered = tuple(self.parents[name] for name in self.parents_order)
+        self.parents_ids = [parent.id for parent in self._parent_nodes_ordered]
 
-        if isinstance(self.distribution, ConditionalDistribution):
+        if self.is_dependent:
             # Check if parents are in the same order as dependencies in distribution table
             for i, possible_values in enumerate(self.distribution.get_dependencies_possible_values()):
                 for value in possible_values:
@@ -123,17 +146,27 @@ class Node:
                         raise RuntimeError('Parents for node: {} are out of order with given distribution'.format(
                             self.name
                         ))
-        if isinstance(self.distribution, ConditionalDistribution):
+        if self.is_dependent:
             # Check if values from parents are in conditional probability table
             pass
 
+        self.distribution.preprocess()
+        if self.is_dependent:
+            # Distribution may be shared by nodes, so mapping of ids of parents values into its keys is kept in node.
+            # Network preprocesses parents before their children, so their values are known
+            parents_values = [parent.distribution.get_values() for parent in self._parent_nodes_ordered]
+            self._parents_cardinalities = tuple(len(values) for values in parents_values)
+            self._keys_map = [self.distribution.get_evidence_key(evidence) for evidence in product(*parents_values)]
+        self._value_to_idx = {value: i for i, value in enumerate(self.distribution.get_values())}
+        self.counter = np.zeros(len(self._value_to_idx), dtype=np.int64)
+
     def reset_counters(self):
         """
         Reset occurrence counters
         :return:
         :rtype:
         """
-        self.counter = {}
+        self.counter.fill(0)
 
     def sample(self, observations: List[str] = None) -> str:
         """
@@ -144,18 +177,46 @@ class Node:
         :return: Sample from node distribution
         :rtype: str
         """
-        if self.evidence is None and self.static_value is None:
-            if self.is_dependent:
-                assert observations is not None, 'Observations must be given if node is dependent'
-                sample = self.distribution.sample(observations)
-            else:
-                sample = self.distribution.sample()
-            self.counter.setdefault(sample, 0)
-            self.counter[sample] += 1
-        elif self.evidence is not None:
-            sample = self.evidence
+        if self.evidence is not None:
+            return self.sample_evidence()
+        if self.static_value is not None:
+            return self.sample_static()
+
+        assert not self.is_dependent or observations is not None, 'Observations must be given if node is dependent'
+        return self.sample_fresh(observations)
+
+    def sample_evidence(self) -> str:
+        """
+        Returns evidence set in node
+
+        :return: Evidence
+        :rtype: str
+        """
+        return self.evidence
+
+    def sample_static(self) -> str:
+        """
+        Returns static value set in node
+
+        :return: Static value
+        :rtype: str
+        """
+        return self.static_value
+
+    def sample_fresh(self, observations: List[str] = None) -> str:
+        """
+        Sample from Node distribution, regardless of evidence and static value, and count the sample
+
+        :param observations: List of observations, must be given if node is dependent
+        :type observations: List[str]
+        :return: Sample from node distribution
+        :rtype: str
+        """
+        if self.is_dependent:
+            sample = self.distribution.sample(observations)
         else:
-            sample = self.static_value
+            sample = self.distribution.sample()
+        self.counter[self._value_to_idx[sample]] += 1
 
         return sample
 
@@ -174,6 +235,51 @@ class Node:
 
         return self.sample(observations)
 
+    def resample_and_fix(self, rng: np.random.Generator = None) -> int:
+        """
+        Samples id of node value given ids of current values of its parents, counts the sample and sets it as id of
+        current value. Used in Gibbs sampling loop, so node must not have evidence set and ids of current values of
+        all nodes must be set with encode_value.
+
+        :param rng: Random numbers generator
+        :type rng: np.random.Generator
+        :return: Id of sample from nodes distribution
+        :rtype: int
+        """
+        if self.is_dependent:
+            key = 0
+            for parent, cardinality in zip(self._parent_nodes_ordered, self._parents_cardinalities):
+                key = key * cardinality + parent._value_id
+            key = self._keys_map[key]
+            if key < 0:
+                raise KeyError('Evidence not found in conditional probability table of node {}'.format(self.name))
+            value_id = self.distribution.sample_id_given_key(key, rng)
+        else:
+            value_id = self.distribution.sample_id(rng)
+        self.counter[value_id] += 1
+        self._value_id = value_id
+
+        return value_id
+
+    def encode_value(self) -> None:
+        """
+        Sets id of current value from evidence or static value, if evidence is not set
+
+        :return: None
+        :rtype: None
+        """
+        value = self.evidence if self.evidence is not None else self.static_value
+        self._value_id = self.distribution.get_value_id(value)
+
+    def decode_value(self) -> None:
+        """
+        Sets static value from id of current value
+
+        :return: None
+        :rtype: None
+        """
+        self.static_value = self.distribution.get_values()[self._value_id]
+
     def set_evidence(self, value: str) -> None:
         """
         Set evidence in node. When evidence is set, sample will return its value
@@ -186,6 +292,15 @@ class Node:
         assert self.distribution.is_value_possible(value), 'Value not found in distribution'
         self.evidence = value
 
+    def remove_evidence(self) -> None:
+        """
+        Removes evidence from node
+
+        :return: None
+        :rtype: None
+        """
+        self.evidence = None
+
     def set_static_value(self, value: str) -> None:
         """
         Set static value in node. When static value is set, sample will return its value
@@ -223,9 +338,10 @@ class Node:
         :return: Dictionary, where each key is possible value in distribution and key is probability of it occuring
         :rtype: Union(None, Dict[str, float])
         """
-        if self.counter:
-            total_occurrences = sum(self.counter.values())
-            return {key: value / float(total_occurrences) for key, value in self.counter.items()}
+        total_occurrences = self.counter.sum()
+        if total_occurrences:
+            probabilities = (self.counter / float(total_occurrences)).tolist()
+            return {value: probabilities[i] for value, i in self._value_to_idx.items()}
         else:
             return None
 
@@ -248,6 +364,40 @@ class BayesNetwork:
 
     def __init__(self):
         self.nodes = {}
+        self._nodes_by_id = []
+        # Nodes without evidence for already seen sets of evidence nodes names
+        self._nodes_without_evidence_cache = {}
+        # Random numbers generator of current sampling
+        self._rng = np.random.default_rng()
+        # Groups of nodes, where nodes in one group are not in each other markov blanket
+        self._color_groups = []
+        # Number of possible values of each node
+        self._cardinalities = None
+
+        # Integer encoded network used by compiled Gibbs kernel
+        self._value_codes = []
+        self._parents_offsets = None
+        self._parents_ids = None
+        self._strides = None
+        self._children_offsets = None
+        self._children_ids = None
+        self._children_strides = None
+        self._cpt_offsets = None
+        self._rows_offsets = None
+        self._cpts = None
+        self._cpts_values = None
+        self._color_groups_ids = []
+        # Sampling state of compiled Gibbs kernel, one entry or row per node
+        self._values = None
+        self._keys = None
+        self._is_evidence = None
+        self._counters = None
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Views are not preserved by pickling, so nodes counters must be bound to network counters again
+        if self._counters is not None:
+            self._bind_counters()
 
     def add_nodes(self, list_of_nodes: List['Node']) -> None:
         """
@@ -258,8 +408,9 @@ class BayesNetwork:
         :return: None
         :rtype: None
         """
-        assert isinstance(list_of_nodes, List) and all(isinstance(x, Node) for x in list_of_nodes)
+        assert isinstance(list_of_nodes, (list, tuple)), 'Nodes must be given as list or tuple'
         for state in list_of_nodes:
+            assert isinstance(state, Node), 'Given state is not a Node'
             if state.name not in self.nodes.keys():
                 self.nodes[state.name] = state
             else:
@@ -295,9 +446,161 @@ class BayesNetwork:
         :rtype: None
         """
         assert self.nodes, 'No nodes in graph'
-        for node in self.nodes.values():
+        # Names are used only at the API boundary, internally nodes are referenced by ids
+        self._nodes_by_id = list(self.nodes.values())
+        for node_id, node in enumerate(self._nodes_by_id):
+            node.id = node_id
+
+        # Parents values are checked and encoded by children, so parents are preprocessed first
+        for node in self._topological_order():
             node.preprocess()
 
+        self._nodes_without_evidence_cache = {}
+        self._cardinalities = np.array([len(node.distribution.get_values()) for node in self._nodes_by_id],
+                                       dtype=np.int64)
+        self._color_groups = self._color_moral_graph()
+
+        if gibbs_kernel is not None:
+            self._compile()
+
+    def _topological_order(self) -> List['Node']:
+        """
+        Orders nodes so that every node is preceded by all of its parents, using Kahn's algorithm.
+
+        :return: List of nodes in topological order
+        :rtype: List['Node']
+        """
+        parents_left = {node.name: len(node.parents) for node in self._nodes_by_id}
+        order = [node for node in self._nodes_by_id if parents_left[node.name] == 0]
+        for node in order:
+            for child in node.children.values():
+                parents_left[child.name] -= 1
+                if parents_left[child.name] == 0:
+                    order.append(child)
+
+        if len(order) != len(self._nodes_by_id):
+            raise ValueError('Network contains a cycle')
+        return order
+
+    def _color_moral_graph(self) -> List[List['Node']]:
+        """
+        Colors moral graph of network with greedy algorithm, visiting nodes with most neighbours first. Neighbours of
+        node in moral graph are nodes in its markov blanket, so nodes of the same color are conditionally independent
+        given nodes of other colors.
+
+        :return: List of groups of nodes with the same color
+        :rtype: List[List['Node']]
+        """
+        colors = [-1] * len(self._nodes_by_id)
+        for node in sorted(self._nodes_by_id, key=lambda x: len(x._markov_blanket_tuple), reverse=True):
+            neighbours_colors = {colors[neighbour.id] for neighbour in node._markov_blanket_tuple}
+            color = 0
+            while color in neighbours_colors:
+                color += 1
+            colors[node.id] = color
+
+        color_groups = [[] for _ in range(max(colors) + 1)]
+        for node in self._nodes_by_id:
+            color_groups[colors[node.id]].append(node)
+
+        return color_groups
+
+    def _compile(self) -> None:
+        """
+        Encodes network as flat arrays used by compiled Gibbs kernel. Each node is given an integer id, each of its
+        values an integer code and its conditional probability table is flattened into rows of cumulative
+        probabilities, where row index (key) is computed from codes of parents values. Only values with nonzero
+        probability are stored in rows, so each row has its own length and entries are mapped back to value codes.
+
+        :return: None
+        :rtype: None
+        """
+        nodes = self._nodes_by_id
+        self._value_codes = [
+            {value: code for code, value in enumerate(node.distribution.get_values())} for node in nodes
+        ]
+
+        parents_offsets = [0]
+        parents_ids = []
+        strides = []
+        cpt_offsets = []
+        rows_lengths = []
+        cpts = []
+        cpts_values = []
+        num_of_all_rows = 0
+        for node_id, node in enumerate(nodes):
+            node_parents_ids = node.parents_ids
+            node_strides = [1] * len(node_parents_ids)
+            for j in range(len(node_parents_ids) - 2, -1, -1):
+                node_strides[j] = node_strides[j + 1] * self._cardinalities[node_parents_ids[j + 1]]
+            num_of_rows = int(np.prod([self._cardinalities[i] for i in node_parents_ids], dtype=np.int64))
+
+            codes = self._value_codes[node_id]
+            if node.is_dependent:
+                # Rows of distribution are reordered, so they are indexed with ids of parents values packed with strides
+                keys_map = np.array(node._keys_map, dtype=np.int64)
+                table = node.distribution.get_probabilities_table()[keys_map]
+                table[keys_map < 0] = 0.0
+            else:
+                table = np.zeros((num_of_rows, len(codes)), dtype=np.float64)
+                for value, code in codes.items():
+                    table[0, code] = node.distribution.distribution[value]
+
+            # Zero probabilities do not change cumulative sums, so they are simply left out. Rows of evidences missing
+            # in conditional probability table are left empty, kernels report them only if they are reached
+            is_possible = table > 0
+            node_rows_lengths = is_possible.sum(axis=1)
+            cumulative = np.cumsum(table, axis=1)[is_possible]
+            cumulative[(np.cumsum(node_rows_lengths) - 1)[node_rows_lengths > 0]] = 1.0
+
+            parents_ids.extend(node_parents_ids)
+            strides.extend(node_strides)
+            parents_offsets.append(len(parents_ids))
+            cpt_offsets.append(num_of_all_rows)
+            rows_lengths.append(node_rows_lengths)
+            cpts.append(cumulative)
+            cpts_values.append(np.nonzero(is_possible)[1])
+            num_of_all_rows += num_of_rows
+
+        self._parents_offsets = np.array(parents_offsets, dtype=np.int64)
+        self._parents_ids = np.array(parents_ids, dtype=np.int64)
+        self._strides = np.array(strides, dtype=np.int64)
+        self._cpt_offsets = np.array(cpt_offsets, dtype=np.int64)
+        self._rows_offsets = np.concatenate([[0], np.cumsum(np.concatenate(rows_lengths))]).astype(np.int64)
+        self._cpts = np.concatenate(cpts)
+        self._cpts_values = np.concatenate(cpts_values).astype(np.int64)
+
+        # Children with stride of node in their tables, so keys of children can be updated when node value changes
+        children = [[] for _ in nodes]
+        for child_id in range(len(nodes)):
+            for j in range(parents_offsets[child_id], parents_offsets[child_id + 1]):
+                children[parents_ids[j]].append((child_id, strides[j]))
+        self._children_offsets = np.cumsum([0] + [len(node_children) for node_children in children], dtype=np.int64)
+        self._children_ids = np.array([child_id for node_children in children for child_id, _ in node_children],
+                                      dtype=np.int64)
+        self._children_strides = np.array([stride for node_children in children for _, stride in node_children],
+                                          dtype=np.int64)
+        self._color_groups_ids = [
+            np.array([node.id for node in group], dtype=np.int64) for group in self._color_groups
+        ]
+
+        self._values = np.zeros(len(nodes), dtype=np.int64)
+        self._keys = np.zeros(len(nodes), dtype=np.int64)
+        self._is_evidence = np.zeros(len(nodes), dtype=np.bool_)
+        self._counters = np.zeros((len(nodes), int(self._cardinalities.max())), dtype=np.int64)
+        self._bind_counters()
+
+    def _bind_counters(self) -> None:
+        """
+        Replaces occurrence counters of nodes with views of network counters, so compiled kernels count samples
+        directly into nodes counters.
+
+        :return: None
+        :rtype: None
+        """
+        for node in self._nodes_by_id:
+            node.counter = self._counters[node.id, :self._cardinalities[node.id]]
+
     def _set_evidences(self, evidence: Dict[str, str]):
         """
         Set evidences.
@@ -308,6 +611,9 @@ class BayesNetwork:
         :return:
         :rtype:
         """
+        # Evidences from previous queries must not leak into current one
+        for state in self._nodes_by_id:
+            state.remove_evidence()
         for name, state in evidence.items():
             self.nodes[name].set_evidence(state)
 
@@ -332,7 +638,7 @@ class BayesNetwork:
         :rtype:
         """
         assert self.nodes
-        for state in self.nodes.values():
+        for state in self._nodes_by_id:
             state.reset_counters()
 
     def _get_nodes_without_evidence(self, evidence: Dict[str, str]):
@@ -345,31 +651,27 @@ class BayesNetwork:
         :return: List of nodes without evidences set
         :rtype: List['Node']
         """
-        nodes_without_evidence = []
-        for state in self.nodes.values():
-            if state.name not in evidence.keys():
-                nodes_without_evidence.append(state)
+        evidence_names = frozenset(evidence)
+        nodes_without_evidence = self._nodes_without_evidence_cache.get(evidence_names)
+        if nodes_without_evidence is None:
+            nodes_without_evidence = [state for state in self._nodes_by_id if state.name not in evidence_names]
+            self._nodes_without_evidence_cache[evidence_names] = nodes_without_evidence
 
         return nodes_without_evidence
 
-    def gibbs(self, evidence: Dict[str, str], query: List[str], n: int) -> Dict[str, Dict[str, float]]:
+    def _prepare_sampling(self, evidence: Dict[str, str], query: List[str]) -> List['Node']:
         """
-        Performc MCMC Gibbs sampling
+        Validates query, sets evidences, resets occurrence counters and sets random initial values in nodes without
+        evidence.
 
         :param evidence:  Evidence in form of dictionary, where keys are nodes names and values are values to be set
         in those nodes.
-        :type evidence:Dict[str, str]
+        :type evidence: Dict[str, str]
         :param query: Names of nodes for which probabilities should be approximated
         :type query: List[str]
-        :param n: Number of loop iterations used in Gibbs sampling
-        :type n: int
-        :return: Dictionary where keys are nodes names and values are dictionaries with probabilities descriptions.
-        :rtype: Dict[str,Dict[str, float]]
+        :return: List of nodes without evidences set
+        :rtype: List['Node']
         """
-        assert self.nodes, 'No nodes added to network'
-        if not query:
-            return {}
-
         for node_name in query:
             if node_name in evidence.keys():
                 raise ValueError('Node {} is in query as well as in evidence'.format(node_name))
@@ -377,28 +679,335 @@ class BayesNetwork:
         self._check_query(query)
         self._set_evidences(evidence)
         self._reset_counters()
+        # Samples buffered with previous generator must not be used in current sampling
+        for state in self._nodes_by_id:
+            state.distribution.clear_buffers()
 
         nodes_without_evidence = self._get_nodes_without_evidence(evidence)
         if not nodes_without_evidence:
             raise ValueError('Every node was given evidence, cant generate any data')
 
-        # setting random initial values
-        for node in nodes_without_evidence:
-            node.set_random_initial_value()
+        # setting random initial values, indexes of values are drawn at once
+        cardinalities = self._cardinalities[[node.id for node in nodes_without_evidence]]
+        initial_indexes = self._rng.integers(0, cardinalities).tolist()
+        for node, index in zip(nodes_without_evidence, initial_indexes):
+            node.static_value = node.distribution.get_values()[index]
 
-        # Monte Carlo simulation
-        for i in range(n):
-            node = random_choice(nodes_without_evidence)
-            markov_blanket = node.get_markov_blanket()
+        return nodes_without_evidence
+
+    def _set_rng(self, seed: Union[None, int, np.random.SeedSequence]) -> None:
+        """
+        Sets random numbers generator of current sampling. Without seed generator shared with distributions is used,
+        so it can be seeded with distributions.seed_rng
 
-            node.set_non_static()
-            value = node.sample_given_markov_blanket(markov_blanket)
-            node.set_static_value(value)
+        :param seed: Seed of random numbers generator
+        :type seed: Union[None, int, np.random.SeedSequence]
+        :return: None
+        :rtype: None
+        """
+        self._rng = get_rng() if seed is None else np.random.default_rng(seed)
 
+    def _get_results(self, query: List[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Returns probabilities approximated for nodes in query
+
+        :param query: Names of nodes for which probabilities were approximated
+        :type query: List[str]
+        :return: Dictionary where keys are nodes names and values are dictionaries with probabilities descriptions.
+        :rtype: Dict[str,Dict[str, float]]
+        """
         results = {}
         for node_name in query:
             results[node_name] = self.nodes[node_name].get_prob()
 
         return results
 
+    def gibbs(self, evidence: Dict[str, str], query: List[str], n: int,
+              seed: int = None) -> Dict[str, Dict[str, float]]:
+        """
+        Performc MCMC Gibbs sampling
+
+        :param evidence:  Evidence in form of dictionary, where keys are nodes names and values are values to be set
+        in those nodes.
+        :type evidence:Dict[str, str]
+        :param query: Names of nodes for which probabilities should be approximated
+        :type query: List[str]
+        :param n: Number of loop iterations used in Gibbs sampling
+        :type n: int
+        :param seed: Seed of random numbers generator, if not given generator shared with distributions is used
+        :type seed: int
+        :return: Dictionary where keys are nodes names and values are dictionaries with probabilities descriptions.
+        :rtype: Dict[str,Dict[str, float]]
+        """
+        assert self.nodes, 'No nodes added to network'
+        if not query:
+            return {}
+
+        self._set_rng(seed)
+        nodes_without_evidence = self._prepare_sampling(evidence, query)
+
+        # Monte Carlo simulation
+        if gibbs_kernel is not None:
+            self._gibbs_compiled(nodes_without_evidence, n)
+        else:
+            self._gibbs_nodes(nodes_without_evidence, n)
+
+        return self._get_results(query)
+
+    def gibbs_block(self, evidence: Dict[str, str], query: List[str], n: int,
+                    seed: int = None) -> Dict[str, Dict[str, float]]:
+        """
+        Performs MCMC block Gibbs sampling. In every iteration nodes are resampled group by group, where nodes in
+        one group are conditionally independent given nodes from other groups, so every node without evidence is
+        resampled once per iteration.
+
+        :param evidence:  Evidence in form of dictionary, where keys are nodes names and values are values to be set
+        in those nodes.
+        :type evidence:Dict[str, str]
+        :param query: Names of nodes for which probabilities should be approximated
+        :type query: List[str]
+        :param n: Number of loop iterations used in Gibbs sampling
+        :type n: int
+        :param seed: Seed of random numbers generator, if not given generator shared with distributions is used
+        :type seed: int
+        :return: Dictionary where keys are nodes names and values are dictionaries with probabilities descriptions.
+        :rtype: Dict[str,Dict[str, float]]
+        """
+        assert self.nodes, 'No nodes added to network'
+        if not query:
+            return {}
+
+        self._set_rng(seed)
+        nodes_without_evidence = self._prepare_sampling(evidence, query)
+
+        if gibbs_block_kernel is not None:
+            self._gibbs_block_compiled(nodes_without_evidence, n)
+        else:
+            groups = [[node for node in group if node.evidence is None] for group in self._color_groups]
+            self._gibbs_block_nodes([group for group in groups if group], n)
+
+        return self._get_results(query)
+
+    def gibbs_parallel(self, evidence: Dict[str, str], query: List[str], n: int, num_chains: int,
+                       seed: int = None) -> Dict[str, Dict[str, float]]:
+        """
+        Performs MCMC Gibbs sampling with independent chains run in parallel processes. Each chain starts from
+        different random initial values and performs n / num_chains iterations, occurrence counters of all chains are
+        summed.
+
+        :param evidence:  Evidence in form of dictionary, where keys are nodes names and values are values to be set
+        in those nodes.
+        :type evidence:Dict[str, str]
+        :param query: Names of nodes for which probabilities should be approximated
+        :type query: List[str]
+        :param n: Number of loop iterations used in Gibbs sampling, summed over all chains
+        :type n: int
+        :param num_chains: Number of independent chains
+        :type num_chains: int
+        :param seed: Root seed from which seeds of chains are spawned, if not given it is drawn from generator shared
+        with distributions
+        :type seed: int
+        :return: Dictionary where keys are nodes names and values are dictionaries with probabilities descriptions.
+        :rtype: Dict[str,Dict[str, float]]
+        """
+        assert self.nodes, 'No nodes added to network'
+        assert num_chains > 0, 'Number of chains must be positive'
+        if not query:
+            return {}
+
+        self._set_rng(seed)
+        self._prepare_sampling(evidence, query)
+
+        if seed is None:
+            seed = int(self._rng.integers(2 ** 63))
+        seeds = np.random.SeedSequence(seed).spawn(num_chains)
+        chains_n = [n // num_chains + (1 if i < n % num_chains else 0) for i in range(num_chains)]
+        # Spawned workers do not inherit state of threads started in parent, which forked workers could deadlock on
+        with get_context('spawn').Pool(num_chains, initializer=_init_worker, initargs=(self,)) as pool:
+            chains_counters = pool.starmap(
+                _run_chain, [(evidence, query, chain_n, chain_seed) for chain_n, chain_seed in zip(chains_n, seeds)]
+            )
+
+        for counters in chains_counters:
+            for node_name, counter in zip(query, counters):
+                self.nodes[node_name].counter += counter
+
+        return self._get_results(query)
+
+    def _gibbs_nodes(self, nodes_without_evidence: List['Node'], n: int) -> None:
+        """
+        Performs Gibbs sampling loop directly on Node objects. Indexes of nodes to be resampled are drawn in chunks.
+
+        :param nodes_without_evidence: List of nodes without evidences set
+        :type nodes_without_evidence: List['Node']
+        :param n: Number of loop iterations
+        :type n: int
+        :return: None
+        :rtype: None
+        """
+        for node in self._nodes_by_id:
+            node.encode_value()
+        for chunk_start in range(0, n, _CHUNK_SIZE):
+            nodes_indexes = self._rng.integers(0, len(nodes_without_evidence), size=min(_CHUNK_SIZE, n - chunk_start))
+            for index in nodes_indexes.tolist():
+                nodes_without_evidence[index].resample_and_fix(self._rng)
+        for node in nodes_without_evidence:
+            node.decode_value()
+
+    def _gibbs_block_nodes(self, groups: List[List['Node']], n: int) -> None:
+        """
+        Performs block Gibbs sampling loop directly on Node objects
+
+        :param groups: Groups of conditionally independent nodes without evidences set
+        :type groups: List[List['Node']]
+        :param n: Number of loop iterations
+        :type n: int
+        :return: None
+        :rtype: None
+        """
+        for node in self._nodes_by_id:
+            node.encode_value()
+        for i in range(n):
+            for group in groups:
+                for node in group:
+                    node.resample_and_fix(self._rng)
+        for group in groups:
+            for node in group:
+                node.decode_value()
+
+    def _encode_state(self) -> None:
+        """
+        Writes codes of current values (evidences or static values) of all nodes, evidence flags and keys of rows in
+        conditional probability tables into state arrays used by compiled kernels
+
+        :return: None
+        :rtype: None
+        """
+        for node in self._nodes_by_id:
+            self._is_evidence[node.id] = node.evidence is not None
+            value = node.evidence if node.evidence is not None else node.static_value
+            self._values[node.id] = self._value_codes[node.id][value]
+
+        # Key of node is sum of codes of its parents values multiplied by their strides
+        self._keys.fill(0)
+        for node_id in range(len(self._nodes_by_id)):
+            for j in range(self._parents_offsets[node_id], self._parents_offsets[node_id + 1]):
+                self._keys[node_id] += self._values[self._parents_ids[j]] * self._strides[j]
+
+    def _decode_state(self, nodes_without_evidence: List['Node']) -> None:
+        """
+        Writes values computed by compiled kernel back to nodes as static values. Occurrence counters of nodes are
+        views of network counters, so they are already up to date.
+
+        :param nodes_without_evidence: List of nodes without evidences set
+        :type nodes_without_evidence: List['Node']
+        :return: None
+        :rtype: None
+        """
+        for node in nodes_without_evidence:
+            node.static_value = node.distribution.get_values()[self._values[node.id]]
+
+    def _check_missing_row(self, node_id: int) -> None:
+        """
+        Raises error if compiled kernel was stopped, because node had to be sampled from row missing in its
+        conditional probability table. Error is the same as raised by distribution in pure Python sampling.
+
+        :param node_id: Id of node returned by kernel, -1 if kernel completed its loop
+        :type node_id: int
+        :return: None
+        :rtype: None
+        """
+        if node_id >= 0:
+            raise KeyError('Evidence not found in conditional probability table of node {}'.format(
+                self._nodes_by_id[node_id].name))
+
+    def _gibbs_compiled(self, nodes_without_evidence: List['Node'], n: int) -> None:
+        """
+        Performs Gibbs sampling loop with compiled kernel on integer encoded network. Random numbers are drawn in
+        chunks and kernel is called once for every chunk.
+
+        :param nodes_without_evidence: List of nodes without evidences set
+        :type nodes_without_evidence: List['Node']
+        :param n: Number of loop iterations
+        :type n: int
+        :return: None
+        :rtype: None
+        """
+        self._encode_state()
+        # Nodes without evidence are in the same order as in network
+        update_ids = np.flatnonzero(~self._is_evidence)
+
+        for chunk_start in range(0, n, _CHUNK_SIZE):
+            chunk_size = min(_CHUNK_SIZE, n - chunk_start)
+            nodes_indexes = self._rng.integers(0, len(update_ids), size=chunk_size)
+            missing = gibbs_kernel(update_ids[nodes_indexes], self._rng.random(chunk_size), self._children_offsets,
+                                   self._children_ids, self._children_strides, self._cpt_offsets, self._rows_offsets,
+                                   self._cpts, self._cpts_values, self._keys, self._values, self._counters)
+            self._check_missing_row(missing)
+
+        self._decode_state(nodes_without_evidence)
+
+    def _gibbs_block_compiled(self, nodes_without_evidence: List['Node'], n: int) -> None:
+        """
+        Performs block Gibbs sampling loop with compiled kernel on integer encoded network. Random numbers are drawn
+        in chunks of whole iterations and kernel is called once for every chunk.
+
+        :param nodes_without_evidence: List of nodes without evidences set
+        :type nodes_without_evidence: List['Node']
+        :param n: Number of loop iterations
+        :type n: int
+        :return: None
+        :rtype: None
+        """
+        self._encode_state()
+        groups = [group_ids[~self._is_evidence[group_ids]] for group_ids in self._color_groups_ids]
+        groups_offsets = np.cumsum([0] + [len(group_ids) for group_ids in groups], dtype=np.int64)
+        groups_ids = np.concatenate(groups)
+
+        chunk_iterations = max(1, _CHUNK_SIZE // len(groups_ids))
+        for chunk_start in range(0, n, chunk_iterations):
+            uniforms = self._rng.random((min(chunk_iterations, n - chunk_start), len(groups_ids)))
+            missing = gibbs_block_kernel(groups_offsets, groups_ids, uniforms, self._children_offsets,
+                                         self._children_ids, self._children_strides, self._cpt_offsets,
+                                         self._rows_offsets, self._cpts, self._cpts_values, self._keys, self._values,
+                                         self._counters)
+            self._check_missing_row(missing)
+
+        self._decode_state(nodes_without_evidence)
+
+
+# Copy of network used by worker process in BayesNetwork.gibbs_parallel
+_worker_network = None
+
 
+def _init_worker(network: 'BayesNetwork') -> None:
+    """
+    Initializes worker process with its own copy of network
+
+    :param network: Preprocessed network
+    :type network: BayesNetwork
+    :return: None
+    :rtype: None
+    """
+    global _worker_network
+    _worker_network = network
+
+
+def _run_chain(evidence: Dict[str, str], query: List[str], n: int, seed: np.random.SeedSequence) -> List[np.ndarray]:
+    """
+    Runs single Gibbs sampling chain on worker copy of network
+
+    :param evidence:  Evidence in form of dictionary, where keys are nodes names and values are values to be set
+    in those nodes.
+    :type evidence:Dict[str, str]
+    :param query: Names of nodes for which probabilities should be approximated
+    :type query: List[str]
+    :param n: Number of loop iterations
+    :type n: int
+    :param seed: Seed of chain
+    :type seed: np.random.SeedSequence
+    :return: Occurrence counters of nodes in query
+    :rtype: List[np.ndarray]
+    """
+    _worker_network.gibbs(evidence, query, n, seed=seed)
+    return [_worker_network.nodes[node_name].counter for node_name in query]
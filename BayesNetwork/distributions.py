@@ -1,9 +1,43 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+from operator import itemgetter
 from random import choice as random_choice
-from typing import List, Dict, Tuple, Generator, Set, Union
+from typing import List, Dict, Generator, Set, Union
 
 import numpy as np
 
+# Generator used when no generator is passed to sample
+_rng = np.random.default_rng()
+# Number of samples drawn at once by sample_id, drawn samples are buffered and returned one by one
+_BUFFER_SIZE = 256
+# Batches of at least this many samples from distributions with at most _MULTINOMIAL_MAX_VALUES values are drawn as
+# shuffled multinomial counts, which was measured to be faster than binary search of every sample
+_MULTINOMIAL_MIN_SAMPLES = 256
+_MULTINOMIAL_MAX_VALUES = 16
+
+
+def seed_rng(seed: int = None) -> None:
+    """
+    Replaces generator shared by distributions with new one created from given seed
+
+    :param seed: Seed of random numbers generator
+    :type seed: int
+    :return: None
+    :rtype: None
+    """
+    global _rng
+    _rng = np.random.default_rng(seed)
+
+
+def get_rng() -> np.random.Generator:
+    """
+    Returns generator shared by distributions
+
+    :return: Random numbers generator
+    :rtype: np.random.Generator
+    """
+    return _rng
+
 
 class Distribution(ABC):
     """
@@ -36,6 +70,22 @@ class Distribution(ABC):
     def get_random_value(self, *args, **kwargs):
         pass
 
+    @abstractmethod
+    def get_values(self, *args, **kwargs):
+        pass
+
+    @abstractmethod
+    def sample_id(self, *args, **kwargs):
+        pass
+
+    @abstractmethod
+    def get_value_id(self, *args, **kwargs):
+        pass
+
+    @abstractmethod
+    def clear_buffers(self, *args, **kwargs):
+        pass
+
 
 class DiscreteDistribution(Distribution):
     """
@@ -50,12 +100,22 @@ class DiscreteDistribution(Distribution):
          and probabilities as values e.g. {'A': 0.1, 'B': 0.9}
         :type distribution: Dict[str, float]
         """
-        assert isinstance(distribution, dict) and all(
-            isinstance(key, str) and isinstance(value, float) for key, value in distribution.items()) and sum(
-            [x for x in distribution.values()]) == 1
+        if __debug__:
+            assert isinstance(distribution, dict) and all(
+                isinstance(key, str) and isinstance(value, float) for key, value in distribution.items())
+            # Exact comparison would reject valid distributions because of floating point rounding
+            assert np.isclose(sum(distribution.values()), 1.0, atol=1e-6), 'Probabilities must sum up to 1'
         self.distribution = distribution
         self._values = None
+        self._id_of = None
+        self._values_array = None
         self._weights = None
+        self._cumulative_weights = None
+        self._cumulative_weights_list = None
+        self._probabilities = None
+        # Probability of first value, set only if there are exactly two values
+        self._first_probability = None
+        self._ids_buffer = []
         self._is_preprocessed = False
 
     def preprocess(self) -> None:
@@ -68,23 +128,86 @@ class DiscreteDistribution(Distribution):
         assert self.distribution is not None
 
         self._values = list(self.distribution.keys())
+        self._id_of = {value: i for i, value in enumerate(self._values)}
+        self._values_array = np.array(self._values, dtype=object)
         self._weights = np.array([self.distribution[key] for key in self._values], dtype=np.float32)
+        # Single precision is sufficient for sampling, uniforms are drawn in the same precision to avoid upcasting
+        self._cumulative_weights = np.cumsum(self._weights, dtype=np.float32)
+        self._cumulative_weights[-1] = 1.0
+        # Bisection on a short list is faster than np.searchsorted for a single sample
+        self._cumulative_weights_list = self._cumulative_weights.tolist()
+        # Probabilities consistent with cumulative weights, so they sum up to 1 as required by multinomial
+        self._probabilities = np.diff(self._cumulative_weights.astype(np.float64), prepend=0.0)
+        if len(self._values) == 2:
+            self._first_probability = self._cumulative_weights_list[0]
 
         self._is_preprocessed = True
 
-    def sample(self, num_of_samples: int = 1) -> Union[str, List[str]]:
+    def sample(self, num_of_samples: int = 1, rng: np.random.Generator = None) -> Union[str, List[str]]:
         """
         Return sample(s) from distribution
         :param num_of_samples: Number of samples to be returned
         :type num_of_samples: int
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
         :return: A single sample or a list of samples
         :rtype: Union[str, List[str]]
         """
         assert self._is_preprocessed, 'Distribution first must be preprocessed'
-        samples = np.random.choice(self._values, num_of_samples, p=self._weights)
+        rng = _rng if rng is None else rng
         if num_of_samples == 1:
-            return samples[0]
-        return list(samples)
+            if self._first_probability is not None:
+                return self._values[0] if rng.random() < self._first_probability else self._values[1]
+            return self._values[bisect_right(self._cumulative_weights_list, rng.random())]
+
+        samples = self._values_array[self._sample_ids_many(num_of_samples, rng)]
+        return samples.tolist()
+
+    def sample_id(self, rng: np.random.Generator = None) -> int:
+        """
+        Return id of a single sample from distribution, ids are positions of values in get_values. Samples are drawn
+        in batches and buffered, so generator is used only when buffer is empty
+
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
+        :return: Id of sampled value
+        :rtype: int
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        if not self._ids_buffer:
+            rng = _rng if rng is None else rng
+            self._ids_buffer = self._sample_ids_many(_BUFFER_SIZE, rng).tolist()
+
+        return self._ids_buffer.pop()
+
+    def _sample_ids_many(self, k: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Return ids of k samples from distribution
+
+        :param k: Number of samples to be returned
+        :type k: int
+        :param rng: Random numbers generator
+        :type rng: np.random.Generator
+        :return: Array of ids of samples
+        :rtype: np.ndarray
+        """
+        if self._first_probability is not None:
+            # With two values single comparison replaces binary search
+            return (rng.random(k, dtype=np.float32) >= self._first_probability).astype(np.intp)
+        if k >= _MULTINOMIAL_MIN_SAMPLES and len(self._values) <= _MULTINOMIAL_MAX_VALUES:
+            ids = np.repeat(np.arange(len(self._values)), rng.multinomial(k, self._probabilities))
+            rng.shuffle(ids)
+            return ids
+        return np.searchsorted(self._cumulative_weights, rng.random(k, dtype=np.float32), side='right')
+
+    def clear_buffers(self) -> None:
+        """
+        Discards samples drawn in advance by sample_id
+
+        :return: None
+        :rtype: None
+        """
+        self._ids_buffer = []
 
     def is_value_possible(self, value: str) -> bool:
         """
@@ -107,6 +230,28 @@ class DiscreteDistribution(Distribution):
         assert self._values, 'Distribution first must be preprocessed'
         return random_choice(self._values)
 
+    def get_values(self) -> List[str]:
+        """
+        Return possible values in distribution
+
+        :return: List of possible values in distribution
+        :rtype: List[str]
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        return self._values
+
+    def get_value_id(self, value: str) -> int:
+        """
+        Return id of value, which is its position in get_values
+
+        :param value: Possible value in distribution
+        :type value: str
+        :return: Id of value
+        :rtype: int
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        return self._id_of[value]
+
 
 class ConditionalDistribution(Distribution):
     """
@@ -131,17 +276,40 @@ class ConditionalDistribution(Distribution):
         Possible values in this example distribution are X and Y
         :type distribution: List[List[Union[str,float]]]
         """
-        assert isinstance(distribution, list) and all(isinstance(x, list) for x in distribution)
-        for x in distribution:
-            assert all(isinstance(y, str) for y in x[:-1]) and (isinstance(x[-1], float) or (isinstance(x[-1], int)))
+        # Validation walks every row, so with optimizations (-O) the whole loop is skipped, not only asserts
+        if __debug__:
+            assert isinstance(distribution, list) and all(isinstance(x, list) for x in distribution)
+            for x in distribution:
+                assert all(isinstance(y, str) for y in x[:-1]) and isinstance(x[-1], (float, int))
         self.distribution = distribution
         self.dist_len = len(self.distribution)
+        self._distribution_array = np.asarray(distribution, dtype=object)
 
         # last two values in a row in table represents value, and probability given evidence
         self.num_of_dependencies = len(distribution[0]) - 2
         self.conditional_distribution_lookup = dict()
+        # Last evidence passed to sample and its entry in lookup, consecutive samples often share evidence
+        self._last_key = None
+        self._last_entry = None
+        self._last_deterministic_value = None
+        # Values of evidences, which have only one possible value, so they are returned without drawing a number. They
+        # are keyed by evidence and, in case of ids, indexed by packed evidence (None if evidence is not deterministic)
+        self._deterministic = dict()
+        self._deterministic_ids = []
+        # Cumulative probabilities and value ids given evidence packed into single integer (key) are stored in
+        # _flat_cdf[_cdf_offsets[key]:_cdf_offsets[key] + _cdf_lens[key]] and in _flat_values at the same positions
+        self._cdf_offsets = None
+        self._cdf_lens = None
+        self._flat_cdf = None
+        self._flat_values = None
+        self._dependencies_ids = []
+        self._dependencies_cardinalities = []
+        # Ids of samples drawn in advance, indexed by packed evidence
+        self._ids_buffers = []
         self._is_preprocessed = False
         self._values = None
+        self._values_array = None
+        self._id_of = None
 
     def preprocess(self):
         """
@@ -152,45 +320,243 @@ class ConditionalDistribution(Distribution):
         """
         assert self.distribution is not None
 
-        def get_possible_values_and_weight_for_evidence(distribution, evidence) -> Tuple[List[str], np.array]:
-            values = []
-            weights = []
-            for x in distribution:
-                if tuple(x[:self.num_of_dependencies]) == evidence:
-                    values.append(x[-2])
-                    weights.append(x[-1])
-
-            weights = np.array(weights)
-            assert sum(weights) == 1
-            return values, weights
-
-        self._values = list(set([x[-2] for x in self.distribution]))
-        possible_evidences = list(set([tuple(x[:self.num_of_dependencies]) for x in self.distribution]))
-        # create a lookup dictionary for probabilities given evidence
-        for possible_evidence in possible_evidences:
-            self.conditional_distribution_lookup[possible_evidence] = get_possible_values_and_weight_for_evidence(
-                self.distribution, possible_evidence)
+        # group values and weights by evidence and collect possible values in a single pass over conditional
+        # probability table
+        groups = dict()
+        seen_values = dict()
+        # itemgetter with more than one index returns tuple without slicing row
+        get_evidence = itemgetter(*range(self.num_of_dependencies)) if self.num_of_dependencies > 1 else (
+            lambda row: tuple(row[:self.num_of_dependencies]))
+        for row in self.distribution:
+            values, weights = groups.setdefault(get_evidence(row), ([], []))
+            values.append(row[-2])
+            weights.append(row[-1])
+            seen_values[row[-2]] = None
+
+        # Values are kept in order of first occurrence, so their ids do not depend on strings hashing
+        self._values = list(seen_values)
+        self._id_of = {value: i for i, value in enumerate(self._values)}
+        self._values_array = np.array(self._values, dtype=object)
+        # Ids of dependencies values depend only on conditional probability table, as it may be shared by nodes, whose
+        # parents list their values in different orders
+        dependencies_values = [sorted(values) for values in self.get_dependencies_possible_values()]
+        self._dependencies_ids = [{value: i for i, value in enumerate(values)} for values in dependencies_values]
+        self._dependencies_cardinalities = [len(values) for values in dependencies_values]
+
+        # create a lookup dictionary for values and cumulative probabilities given evidence
+        totals = []
+        entries = []
+        deterministic_entries = []
+        for evidence, (values, weights) in groups.items():
+            weights = np.asarray(weights, dtype=np.float32)
+            cumulative_weights = np.cumsum(weights, dtype=np.float32)
+            totals.append(cumulative_weights[-1])
+            cumulative_weights[-1] = 1.0
+            self.conditional_distribution_lookup[evidence] = (values, cumulative_weights.tolist())
+
+            key = 0
+            for value, ids, cardinality in zip(evidence, self._dependencies_ids, self._dependencies_cardinalities):
+                key = key * cardinality + ids[value]
+            entries.append((key, cumulative_weights, [self._id_of[value] for value in values]))
+
+            if np.count_nonzero(weights) == 1:
+                value = values[int(np.flatnonzero(weights)[0])]
+                self._deterministic[evidence] = value
+                deterministic_entries.append((key, self._id_of[value]))
+        assert np.allclose(totals, 1.0, atol=1e-6), 'Probabilities given each evidence must sum up to 1'
+
+        # Flat table is ordered by keys, keys of evidences missing in conditional probability table have no entries
+        entries.sort(key=lambda entry: entry[0])
+        num_of_keys = int(np.prod(self._dependencies_cardinalities, dtype=np.int64))
+        self._cdf_lens = np.zeros(num_of_keys, dtype=np.int32)
+        for key, cumulative_weights, _ in entries:
+            self._cdf_lens[key] = len(cumulative_weights)
+        self._cdf_offsets = (np.cumsum(self._cdf_lens, dtype=np.int32) - self._cdf_lens).astype(np.int32)
+        self._flat_cdf = np.concatenate([cumulative_weights for _, cumulative_weights, _ in entries])
+        self._flat_values = np.array([value_id for _, _, values_ids in entries for value_id in values_ids],
+                                     dtype=np.int32)
+        self._ids_buffers = [[] for _ in range(num_of_keys)]
+        self._deterministic_ids = [None] * num_of_keys
+        for key, value_id in deterministic_entries:
+            self._deterministic_ids[key] = value_id
 
         self._is_preprocessed = True
 
-    def sample(self, evidence: List[str], num_of_samples: int = 1) -> Union[str, List[str]]:
+    def sample(self, evidence: List[str], num_of_samples: int = 1,
+               rng: np.random.Generator = None) -> Union[str, List[str]]:
         """
         Return sample(s) from distribution given evidence
         :param num_of_samples: Number of samples to be returned
         :type num_of_samples: int
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
         :return: A single sample or a list of samples
         :rtype: Union[str, List[str]]
         """
         assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        rng = _rng if rng is None else rng
+
+        key = evidence if isinstance(evidence, tuple) else tuple(evidence)
+        if key == self._last_key:
+            values, cumulative_weights = self._last_entry
+        else:
+            values, cumulative_weights = self._last_entry = self.conditional_distribution_lookup[key]
+            self._last_deterministic_value = self._deterministic.get(key)
+            self._last_key = key
+
+        if self._last_deterministic_value is not None:
+            if num_of_samples == 1:
+                return self._last_deterministic_value
+            return [self._last_deterministic_value] * num_of_samples
 
-        evidence = tuple(evidence)
-        samples = np.random.choice(
-            self.conditional_distribution_lookup[evidence][0], num_of_samples,
-            p=self.conditional_distribution_lookup[evidence][1])[:][0]
         if num_of_samples == 1:
-            return samples
+            if len(values) == 2:
+                return values[0] if rng.random() < cumulative_weights[0] else values[1]
+            return values[bisect_right(cumulative_weights, rng.random())]
+
+        indexes = np.searchsorted(cumulative_weights, rng.random(num_of_samples), side='right')
+        samples = [values[i] for i in indexes.tolist()]
         return samples
 
+    def sample_id(self, evidence_ids: List[int], rng: np.random.Generator = None) -> int:
+        """
+        Return id of a single sample from distribution given ids of evidence values, ids are positions of values in
+        sorted possible values of each dependency. Samples are drawn in batches for each evidence and buffered, so
+        generator is used only when buffer for given evidence is empty
+
+        :param evidence_ids: Ids of values of dependencies
+        :type evidence_ids: List[int]
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
+        :return: Id of sampled value
+        :rtype: int
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+
+        key = 0
+        for value_id, cardinality in zip(evidence_ids, self._dependencies_cardinalities):
+            key = key * cardinality + value_id
+        return self.sample_id_given_key(key, rng)
+
+    def sample_id_given_key(self, key: int, rng: np.random.Generator = None) -> int:
+        """
+        Return id of a single sample from distribution given evidence packed into single integer with get_evidence_key
+
+        :param key: Evidence packed into single integer
+        :type key: int
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
+        :return: Id of sampled value
+        :rtype: int
+        """
+        value_id = self._deterministic_ids[key]
+        if value_id is not None:
+            return value_id
+
+        ids_buffer = self._ids_buffers[key]
+        if not ids_buffer:
+            rng = _rng if rng is None else rng
+            ids_buffer = self._sample_ids_many(key, _BUFFER_SIZE, rng).tolist()
+            self._ids_buffers[key] = ids_buffer
+
+        return ids_buffer.pop()
+
+    def sample_many(self, evidence: List[str], k: int, rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Return k samples from distribution given evidence, drawn at once
+
+        :param evidence: Values of dependencies
+        :type evidence: List[str]
+        :param k: Number of samples to be returned
+        :type k: int
+        :param rng: Random numbers generator, module level generator is used if not given
+        :type rng: np.random.Generator
+        :return: Array of samples
+        :rtype: np.ndarray
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        rng = _rng if rng is None else rng
+
+        key = self.get_evidence_key(evidence)
+        if key < 0:
+            raise KeyError('Evidence not found in conditional probability table')
+        return self._values_array[self._sample_ids_many(key, k, rng)]
+
+    def get_evidence_key(self, evidence: List[str]) -> int:
+        """
+        Packs evidence into single integer, which is row index in get_probabilities_table
+
+        :param evidence: Values of dependencies
+        :type evidence: List[str]
+        :return: Evidence packed into single integer or -1 if any value is not found in conditional probability table
+        :rtype: int
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        key = 0
+        for value, cardinality, ids in zip(evidence, self._dependencies_cardinalities, self._dependencies_ids):
+            if value not in ids:
+                return -1
+            key = key * cardinality + ids[value]
+        return key
+
+    def _sample_ids_many(self, key: int, k: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Return ids of k samples from distribution given packed evidence
+
+        :param key: Evidence packed into single integer
+        :type key: int
+        :param k: Number of samples to be returned
+        :type k: int
+        :param rng: Random numbers generator
+        :type rng: np.random.Generator
+        :return: Array of ids of samples
+        :rtype: np.ndarray
+        """
+        offset = self._cdf_offsets[key]
+        length = self._cdf_lens[key]
+        if not length:
+            raise KeyError('Evidence not found in conditional probability table')
+        if self._deterministic_ids[key] is not None:
+            return np.full(k, self._deterministic_ids[key], dtype=np.int32)
+
+        uniforms = rng.random(k, dtype=np.float32)
+        if length == 2:
+            # With two values single comparison replaces binary search
+            indexes = offset + (uniforms >= self._flat_cdf[offset])
+        else:
+            indexes = offset + np.searchsorted(self._flat_cdf[offset:offset + length], uniforms, side='right')
+        return self._flat_values[indexes]
+
+    def clear_buffers(self) -> None:
+        """
+        Discards samples drawn in advance by sample_id
+
+        :return: None
+        :rtype: None
+        """
+        self._ids_buffers = [[] for _ in range(len(self._ids_buffers))]
+
+    def get_probabilities_table(self) -> np.ndarray:
+        """
+        Return probabilities of values given every evidence. Row index is evidence packed into single integer and
+        column index is id of value, rows of evidences missing in conditional probability table are filled with zeros
+
+        :return: Table of probabilities
+        :rtype: np.ndarray
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        table = np.zeros((len(self._cdf_lens), len(self._values)), dtype=np.float64)
+
+        probabilities = self._flat_cdf.astype(np.float64)
+        probabilities[1:] -= self._flat_cdf[:-1]
+        is_present = self._cdf_lens > 0
+        starts = self._cdf_offsets[is_present]
+        probabilities[starts] = self._flat_cdf[starts]
+
+        rows = np.repeat(np.arange(len(self._cdf_lens)), self._cdf_lens)
+        table[rows, self._flat_values] = probabilities
+        return table
+
     def is_value_possible(self, value: str):
         """
         Returns if value is possible in distribution
@@ -212,6 +578,28 @@ class ConditionalDistribution(Distribution):
         assert self._values, 'To get random value, distribution first must be preprocessed'
         return random_choice(self._values)
 
+    def get_values(self) -> List[str]:
+        """
+        Return possible values in distribution
+
+        :return: List of possible values in distribution
+        :rtype: List[str]
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        return self._values
+
+    def get_value_id(self, value: str) -> int:
+        """
+        Return id of value, which is its position in get_values
+
+        :param value: Possible value in distribution
+        :type value: str
+        :return: Id of value
+        :rtype: int
+        """
+        assert self._is_preprocessed, 'Distribution first must be preprocessed'
+        return self._id_of[value]
+
     def get_dependencies_possible_values(self) -> Generator[Set[str], None, None]:
         """
         Generator that returns possible possible values for i-th dependency
@@ -219,8 +607,5 @@ class ConditionalDistribution(Distribution):
         :return: Generator for possible values in i-th column in conditional probability table (except last two columns)
         :rtype: Generator[Set[str]]
         """
-        for i in range(self.num_of_dependencies - 2):
-            ith_column = [x[i] for x in self.distribution]
-            possible_values = set(ith_column)
-
-            yield possible_values
+        for i in range(self.num_of_dependencies):
+            yield set(np.unique(self._distribution_array[:, i]).tolist())
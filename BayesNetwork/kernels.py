@@ -0,0 +1,196 @@
+"""
+Compiled kernels used in Gibbs sampling. Kernels are taken from Cython extension if it was built, otherwise they are
+compiled with Numba. Both are optional, when neither is available kernels are None and sampling is performed directly
+on Node objects.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _sample_value(node: int, uniform: float, keys: np.ndarray, cpt_offsets: np.ndarray, rows_offsets: np.ndarray,
+                  cpts: np.ndarray, cpts_values: np.ndarray) -> int:
+    """
+    Samples value code of node given current values of its parents.
+
+    :param node: Id of node to be sampled
+    :type node: int
+    :param uniform: Number drawn from uniform distribution on [0, 1)
+    :type uniform: float
+    :param keys: Index of row of conditional probability table selected by current values of parents of each node
+    :type keys: np.ndarray
+    :param cpt_offsets: Index of first row of each node conditional probability table in rows_offsets
+    :type cpt_offsets: np.ndarray
+    :param rows_offsets: Entries of i-th row are stored in cpts[rows_offsets[i]:rows_offsets[i + 1]]
+    :type rows_offsets: np.ndarray
+    :param cpts: Flattened rows of cumulative probabilities of all nodes, only values with nonzero probability are
+    stored
+    :type cpts: np.ndarray
+    :param cpts_values: Value code of each entry in cpts
+    :type cpts_values: np.ndarray
+    :return: Sampled value code or -1 if row is missing in conditional probability table
+    :rtype: int
+    """
+    row = cpt_offsets[node] + keys[node]
+
+    # Binary search for first cumulative probability greater than drawn number
+    low = rows_offsets[row]
+    high = rows_offsets[row + 1] - 1
+    if high < low:
+        return -1
+    while low < high:
+        middle = (low + high) // 2
+        if cpts[middle] > uniform:
+            high = middle
+        else:
+            low = middle + 1
+
+    return cpts_values[low]
+
+
+def _set_value(node: int, value: int, children_offsets: np.ndarray, children_ids: np.ndarray,
+               children_strides: np.ndarray, keys: np.ndarray, values: np.ndarray) -> None:
+    """
+    Sets value code of node and updates keys of its children
+
+    :param node: Id of node
+    :type node: int
+    :param value: New value code of node
+    :type value: int
+    :param children_offsets: Children of i-th node are stored in
+    children_ids[children_offsets[i]:children_offsets[i + 1]]
+    :type children_offsets: np.ndarray
+    :param children_ids: Ids of children of all nodes
+    :type children_ids: np.ndarray
+    :param children_strides: Stride of node in conditional probability table of each child in children_ids
+    :type children_strides: np.ndarray
+    :param keys: Index of row of conditional probability table selected by current values of parents of each node
+    :type keys: np.ndarray
+    :param values: Current value code of each node
+    :type values: np.ndarray
+    :return: None
+    :rtype: None
+    """
+    difference = value - values[node]
+    if difference != 0:
+        for j in range(children_offsets[node], children_offsets[node + 1]):
+            keys[children_ids[j]] += difference * children_strides[j]
+        values[node] = value
+
+
+def _gibbs_kernel(update_ids: np.ndarray, uniforms: np.ndarray, children_offsets: np.ndarray,
+                  children_ids: np.ndarray, children_strides: np.ndarray, cpt_offsets: np.ndarray,
+                  rows_offsets: np.ndarray, cpts: np.ndarray, cpts_values: np.ndarray, keys: np.ndarray,
+                  values: np.ndarray, counters: np.ndarray) -> int:
+    """
+    Performs Gibbs sampling loop on integer encoded network. Values, keys and counters are updated in place. Loop is
+    stopped when node has to be sampled from row missing in its conditional probability table.
+
+    :param update_ids: Ids of nodes to be resampled in consecutive iterations
+    :type update_ids: np.ndarray
+    :param uniforms: Numbers drawn from uniform distribution on [0, 1), one for every iteration
+    :type uniforms: np.ndarray
+    :param children_offsets: Children of i-th node are stored in
+    children_ids[children_offsets[i]:children_offsets[i + 1]]
+    :type children_offsets: np.ndarray
+    :param children_ids: Ids of children of all nodes
+    :type children_ids: np.ndarray
+    :param children_strides: Stride of node in conditional probability table of each child in children_ids
+    :type children_strides: np.ndarray
+    :param cpt_offsets: Index of first row of each node conditional probability table in rows_offsets
+    :type cpt_offsets: np.ndarray
+    :param rows_offsets: Entries of i-th row are stored in cpts[rows_offsets[i]:rows_offsets[i + 1]]
+    :type rows_offsets: np.ndarray
+    :param cpts: Flattened rows of cumulative probabilities of all nodes
+    :type cpts: np.ndarray
+    :param cpts_values: Value code of each entry in cpts
+    :type cpts_values: np.ndarray
+    :param keys: Index of row of conditional probability table selected by current values of parents of each node
+    :type keys: np.ndarray
+    :param values: Current value code of each node
+    :type values: np.ndarray
+    :param counters: Occurrence counters, indexed by node id and value code
+    :type counters: np.ndarray
+    :return: Id of node with missing row or -1 if loop was completed
+    :rtype: int
+    """
+    for i in range(update_ids.shape[0]):
+        node = update_ids[i]
+        value = _sample_value(node, uniforms[i], keys, cpt_offsets, rows_offsets, cpts, cpts_values)
+        if value < 0:
+            return node
+        _set_value(node, value, children_offsets, children_ids, children_strides, keys, values)
+        counters[node, value] += 1
+
+    return -1
+
+
+def _gibbs_block_kernel(groups_offsets: np.ndarray, groups_ids: np.ndarray, uniforms: np.ndarray,
+                        children_offsets: np.ndarray, children_ids: np.ndarray, children_strides: np.ndarray,
+                        cpt_offsets: np.ndarray, rows_offsets: np.ndarray, cpts: np.ndarray,
+                        cpts_values: np.ndarray, keys: np.ndarray, values: np.ndarray, counters: np.ndarray) -> int:
+    """
+    Performs block Gibbs sampling loop on integer encoded network. In every iteration groups of conditionally
+    independent nodes are resampled one after another. Nodes within group are resampled sequentially, which is
+    equivalent to resampling them at once, as groups are too small to benefit from threads. Values, keys and counters
+    are updated in place. Loop is stopped when node has to be sampled from row missing in its conditional probability
+    table.
+
+    :param groups_offsets: Nodes of i-th group are stored in groups_ids[groups_offsets[i]:groups_offsets[i + 1]]
+    :type groups_offsets: np.ndarray
+    :param groups_ids: Ids of nodes to be resampled, ordered by groups
+    :type groups_ids: np.ndarray
+    :param uniforms: Numbers drawn from uniform distribution on [0, 1), one for every iteration and node in
+    groups_ids
+    :type uniforms: np.ndarray
+    :param children_offsets: Children of i-th node are stored in
+    children_ids[children_offsets[i]:children_offsets[i + 1]]
+    :type children_offsets: np.ndarray
+    :param children_ids: Ids of children of all nodes
+    :type children_ids: np.ndarray
+    :param children_strides: Stride of node in conditional probability table of each child in children_ids
+    :type children_strides: np.ndarray
+    :param cpt_offsets: Index of first row of each node conditional probability table in rows_offsets
+    :type cpt_offsets: np.ndarray
+    :param rows_offsets: Entries of i-th row are stored in cpts[rows_offsets[i]:rows_offsets[i + 1]]
+    :type rows_offsets: np.ndarray
+    :param cpts: Flattened rows of cumulative probabilities of all nodes
+    :type cpts: np.ndarray
+    :param cpts_values: Value code of each entry in cpts
+    :type cpts_values: np.ndarray
+    :param keys: Index of row of conditional probability table selected by current values of parents of each node
+    :type keys: np.ndarray
+    :param values: Current value code of each node
+    :type values: np.ndarray
+    :param counters: Occurrence counters, indexed by node id and value code
+    :type counters: np.ndarray
+    :return: Id of node with missing row or -1 if loop was completed
+    :rtype: int
+    """
+    for i in range(uniforms.shape[0]):
+        for group in range(groups_offsets.shape[0] - 1):
+            for j in range(groups_offsets[group], groups_offsets[group + 1]):
+                node = groups_ids[j]
+                value = _sample_value(node, uniforms[i, j], keys, cpt_offsets, rows_offsets, cpts, cpts_values)
+                if value < 0:
+                    return node
+                _set_value(node, value, children_offsets, children_ids, children_strides, keys, values)
+                counters[node, value] += 1
+
+    return -1
+
+
+try:
+    from BayesNetwork._gibbs_cy import gibbs_kernel, gibbs_block_kernel
+except ImportError:
+    if njit is not None:
+        _sample_value = njit(cache=True)(_sample_value)
+        _set_value = njit(cache=True)(_set_value)
+        gibbs_kernel = njit(cache=True)(_gibbs_kernel)
+        gibbs_block_kernel = njit(cache=True)(_gibbs_block_kernel)
+    else:
+        gibbs_kernel = None
+        gibbs_block_kernel = None
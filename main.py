@@ -5,13 +5,11 @@ __author__ = 'Piotr Kramek'
 if __name__ == '__main__':
     from pprint import pprint
 
-    from numpy import random
-
     from BayesNetwork.bayesNetwork import Node, BayesNetwork
-    from BayesNetwork.distributions import DiscreteDistribution, ConditionalDistribution
+    from BayesNetwork.distributions import DiscreteDistribution, ConditionalDistribution, seed_rng
 
     # Random seed initialization
-    random.seed(42)
+    seed_rng(42)
 
     fever_dist = DiscreteDistribution({'fever': 0.05, 'no fever': 0.95})
     fatigue_dist = DiscreteDistribution({'fatigue': 0.3, 'no fatigue': 0.7})
@@ -0,0 +1,20 @@
+from setuptools import setup, Extension
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+# Cython extension with Gibbs sampling kernels is optional, without it Numba or pure Python sampling is used
+ext_modules = []
+if cythonize is not None:
+    ext_modules = cythonize(
+        [Extension('BayesNetwork._gibbs_cy', ['BayesNetwork/_gibbs_cy.pyx'], extra_compile_args=['-O3'])]
+    )
+
+setup(
+    name='BayesNetworks',
+    packages=['BayesNetwork'],
+    install_requires=['numpy'],
+    ext_modules=ext_modules,
+)
@@ -0,0 +1,95 @@
+import unittest
+from collections import Counter
+
+import numpy as np
+
+from BayesNetwork.distributions import DiscreteDistribution, ConditionalDistribution
+
+WEIGHTS = {'a': 0.1, 'b': 0.2, 'c': 0.3, 'd': 0.4}
+N = 20000
+# Around seven standard deviations of probability estimated from N independent samples
+TOLERANCE = 0.025
+
+
+class DistributionTestCase(unittest.TestCase):
+    def assertFrequenciesClose(self, samples, weights):
+        counts = Counter(samples)
+        self.assertLessEqual(set(counts), set(weights))
+        for value, weight in weights.items():
+            self.assertAlmostEqual(counts[value] / len(samples), weight, delta=TOLERANCE, msg=value)
+
+
+class TestDiscreteDistribution(DistributionTestCase):
+    def setUp(self):
+        self.distribution = DiscreteDistribution(WEIGHTS)
+        self.distribution.preprocess()
+        self.rng = np.random.default_rng(0)
+
+    def test_sample_single(self):
+        samples = [self.distribution.sample(rng=self.rng) for _ in range(N)]
+        self.assertFrequenciesClose(samples, WEIGHTS)
+
+    def test_sample_small_batches(self):
+        samples = []
+        for _ in range(N // 100):
+            batch = self.distribution.sample(100, rng=self.rng)
+            self.assertEqual(len(batch), 100)
+            samples.extend(batch)
+        self.assertFrequenciesClose(samples, WEIGHTS)
+
+    def test_sample_large_batch(self):
+        samples = self.distribution.sample(N, rng=self.rng)
+        self.assertEqual(len(samples), N)
+        self.assertTrue(all(isinstance(sample, str) for sample in samples))
+        self.assertFrequenciesClose(samples, WEIGHTS)
+        # Samples drawn as multinomial counts must be shuffled
+        self.assertNotEqual(samples, sorted(samples))
+
+    def test_sample_id(self):
+        values = self.distribution.get_values()
+        samples = [values[self.distribution.sample_id(self.rng)] for _ in range(N)]
+        self.assertFrequenciesClose(samples, WEIGHTS)
+
+
+class TestConditionalDistribution(DistributionTestCase):
+    def setUp(self):
+        self.distribution = ConditionalDistribution(
+            [['x', value, weight] for value, weight in WEIGHTS.items()] + [['y', 'a', 0.0], ['y', 'b', 1.0]]
+        )
+        self.distribution.preprocess()
+        self.rng = np.random.default_rng(0)
+
+    def test_sample(self):
+        for num_of_samples in [2, N]:
+            samples = self.distribution.sample(['x'], num_of_samples, rng=self.rng)
+            self.assertIsInstance(samples, list)
+            self.assertEqual(len(samples), num_of_samples)
+            self.assertTrue(all(isinstance(sample, str) for sample in samples))
+        self.assertFrequenciesClose(samples, WEIGHTS)
+
+    def test_sample_many(self):
+        samples = self.distribution.sample_many(['x'], N, rng=self.rng)
+        self.assertEqual(len(samples), N)
+        self.assertFrequenciesClose(samples.tolist(), WEIGHTS)
+
+    def test_sample_id(self):
+        values = self.distribution.get_values()
+        # Ids of evidence values are their positions in sorted values of dependency
+        samples = [values[self.distribution.sample_id([0], self.rng)] for _ in range(N)]
+        self.assertFrequenciesClose(samples, WEIGHTS)
+
+    def test_deterministic_evidence(self):
+        # Evidence with single possible value is cached after other evidence, so cached entry is replaced
+        self.distribution.sample(['x'], rng=self.rng)
+        state = self.rng.bit_generator.state
+        for _ in range(2 * N // 100):
+            self.assertEqual(self.distribution.sample(['y'], rng=self.rng), 'b')
+            self.assertEqual(self.distribution.sample(['y'], 3, rng=self.rng), ['b', 'b', 'b'])
+            self.assertEqual(self.distribution.sample_id([1], self.rng), self.distribution.get_value_id('b'))
+        self.assertEqual(self.distribution.sample_many(['y'], 3, rng=self.rng).tolist(), ['b', 'b', 'b'])
+        # No random numbers are drawn for deterministic evidence
+        self.assertEqual(self.rng.bit_generator.state, state)
+
+
+if __name__ == '__main__':
+    unittest.main()
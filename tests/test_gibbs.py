@@ -0,0 +1,208 @@
+import itertools
+import unittest
+from unittest import mock
+
+from BayesNetwork import bayesNetwork
+from BayesNetwork.bayesNetwork import Node, BayesNetwork
+from BayesNetwork.distributions import DiscreteDistribution, ConditionalDistribution
+
+# Network from main.py, nodes are listed with their parents in order of edges
+FEVER = {'fever': 0.05, 'no fever': 0.95}
+FATIGUE = {'fatigue': 0.3, 'no fatigue': 0.7}
+SHORTNESS_OF_BREATH = {'shortness of breath': 0.01, 'no shortness of breath': 0.99}
+CORONAVIRUS = [
+    ['fever', 'fatigue', 'shortness of breath', 'sick', 0.8],
+    ['fever', 'fatigue', 'shortness of breath', 'not sick', 0.2],
+    ['fever', 'fatigue', 'no shortness of breath', 'sick', 0.6],
+    ['fever', 'fatigue', 'no shortness of breath', 'not sick', 0.4],
+    ['fever', 'no fatigue', 'shortness of breath', 'sick', 0.5],
+    ['fever', 'no fatigue', 'shortness of breath', 'not sick', 0.5],
+    ['fever', 'no fatigue', 'no shortness of breath', 'sick', 0.4],
+    ['fever', 'no fatigue', 'no shortness of breath', 'not sick', 0.6],
+    ['no fever', 'fatigue', 'shortness of breath', 'sick', 0.75],
+    ['no fever', 'fatigue', 'shortness of breath', 'not sick', 0.25],
+    ['no fever', 'fatigue', 'no shortness of breath', 'sick', 0.2],
+    ['no fever', 'fatigue', 'no shortness of breath', 'not sick', 0.8],
+    ['no fever', 'no fatigue', 'shortness of breath', 'sick', 0.3],
+    ['no fever', 'no fatigue', 'shortness of breath', 'not sick', 0.7],
+    ['no fever', 'no fatigue', 'no shortness of breath', 'sick', 0.01],
+    ['no fever', 'no fatigue', 'no shortness of breath', 'not sick', 0.99],
+]
+TEST = [
+    ['sick', 'positive', 0.9],
+    ['sick', 'negative', 0.1],
+    ['not sick', 'positive', 0.05],
+    ['not sick', 'negative', 0.95]
+]
+HOSPITALIZED = [
+    ['sick', 'positive', 'hospitalized', 0.6],
+    ['sick', 'positive', 'not hospitalized', 0.4],
+    ['sick', 'negative', 'hospitalized', 0],
+    ['sick', 'negative', 'not hospitalized', 1],
+    ['not sick', 'positive', 'hospitalized', 0.1],
+    ['not sick', 'positive', 'not hospitalized', 0.9],
+    ['not sick', 'negative', 'hospitalized', 0.0],
+    ['not sick', 'negative', 'not hospitalized', 1.0],
+]
+NETWORK = [
+    ('Fever', FEVER, []),
+    ('Fatigue', FATIGUE, []),
+    ('Shortness of breath', SHORTNESS_OF_BREATH, []),
+    ('Coronavirus', CORONAVIRUS, ['Fever', 'Fatigue', 'Shortness of breath']),
+    ('Test', TEST, ['Coronavirus']),
+    ('Hospitalized', HOSPITALIZED, ['Coronavirus', 'Test']),
+]
+
+# Gibbs loop samples nodes given current values of their parents only, so evidence is set on root nodes and only
+# nodes with at most one parent without evidence are queried, as their marginals do not depend on order of updates
+EVIDENCES = [
+    {'Fever': 'fever', 'Fatigue': 'fatigue', 'Shortness of breath': 'shortness of breath'},
+    {'Fever': 'fever', 'Fatigue': 'no fatigue', 'Shortness of breath': 'no shortness of breath'},
+    {'Fever': 'no fever', 'Fatigue': 'no fatigue', 'Shortness of breath': 'no shortness of breath'},
+]
+QUERY = ['Coronavirus', 'Test']
+N = 20000
+# Consecutive samples of a chain are correlated, so tolerance is wider than for N independent samples
+TOLERANCE = 0.04
+
+
+def build_network() -> BayesNetwork:
+    network = BayesNetwork()
+    nodes = {}
+    for name, table, _ in NETWORK:
+        if isinstance(table, dict):
+            nodes[name] = Node(DiscreteDistribution(table), name=name)
+        else:
+            nodes[name] = Node(ConditionalDistribution(table), name=name)
+    network.add_nodes(list(nodes.values()))
+    for name, _, parents in NETWORK:
+        for parent in parents:
+            network.add_edge(nodes[parent], nodes[name])
+    network.preprocess()
+
+    return network
+
+
+def exact_marginals(evidence, query):
+    """
+    Calculates marginal distributions of query nodes by enumeration of joint distribution
+    """
+    tables = []
+    for name, table, parents in NETWORK:
+        if isinstance(table, dict):
+            tables.append({(value,): probability for value, probability in table.items()})
+        else:
+            tables.append({tuple(row[:-1]): row[-1] for row in table})
+    names = [name for name, _, _ in NETWORK]
+    values = [sorted({key[-1] for key in table}) for table in tables]
+
+    marginals = {name: {} for name in query}
+    for assignment in itertools.product(*values):
+        state = dict(zip(names, assignment))
+        if any(state[name] != value for name, value in evidence.items()):
+            continue
+        probability = 1.0
+        for (name, _, parents), table in zip(NETWORK, tables):
+            probability *= table[tuple(state[parent] for parent in parents) + (state[name],)]
+        for name in query:
+            marginals[name][state[name]] = marginals[name].get(state[name], 0.0) + probability
+
+    for distribution in marginals.values():
+        total = sum(distribution.values())
+        for value in distribution:
+            distribution[value] /= total
+    return marginals
+
+
+class TestGibbs(unittest.TestCase):
+    def setUp(self):
+        self.network = build_network()
+
+    def assertMarginalsClose(self, results, evidence):
+        expected = exact_marginals(evidence, QUERY)
+        for name in QUERY:
+            for value, probability in expected[name].items():
+                self.assertAlmostEqual(results[name].get(value, 0.0), probability, delta=TOLERANCE,
+                                       msg='{} = {} given {}'.format(name, value, evidence))
+
+    def test_gibbs_default_backend(self):
+        for seed, evidence in enumerate(EVIDENCES):
+            self.assertMarginalsClose(self.network.gibbs(evidence, QUERY, N, seed=seed), evidence)
+
+    def test_gibbs_python(self):
+        with mock.patch.object(bayesNetwork, 'gibbs_kernel', None):
+            for seed, evidence in enumerate(EVIDENCES):
+                self.assertMarginalsClose(self.network.gibbs(evidence, QUERY, N, seed=seed), evidence)
+
+    def test_gibbs_block_default_backend(self):
+        for seed, evidence in enumerate(EVIDENCES):
+            self.assertMarginalsClose(self.network.gibbs_block(evidence, QUERY, N, seed=seed), evidence)
+
+    def test_gibbs_block_python(self):
+        with mock.patch.object(bayesNetwork, 'gibbs_block_kernel', None):
+            for seed, evidence in enumerate(EVIDENCES):
+                self.assertMarginalsClose(self.network.gibbs_block(evidence, QUERY, N, seed=seed), evidence)
+
+    def test_gibbs_parallel(self):
+        evidence = EVIDENCES[0]
+        self.assertMarginalsClose(self.network.gibbs_parallel(evidence, QUERY, N, num_chains=2, seed=0), evidence)
+
+    def test_gibbs_seeded_is_reproducible(self):
+        evidence = EVIDENCES[0]
+        self.assertEqual(self.network.gibbs(evidence, QUERY, N, seed=7), self.network.gibbs(evidence, QUERY, N, seed=7))
+
+
+class TestSharedDistribution(unittest.TestCase):
+    def setUp(self):
+        # Parents list the same values in different orders, so their ids differ between nodes sharing the table
+        table = ConditionalDistribution([['x', 'on', 0.9], ['x', 'off', 0.1], ['y', 'on', 0.1], ['y', 'off', 0.9]])
+        first_parent = Node(DiscreteDistribution({'x': 1.0, 'y': 0.0}), name='P1')
+        second_parent = Node(DiscreteDistribution({'y': 0.0, 'x': 1.0}), name='P2')
+        first_child = Node(table, name='C1')
+        second_child = Node(table, name='C2')
+        self.network = BayesNetwork()
+        self.network.add_nodes([first_parent, second_parent, first_child, second_child])
+        self.network.add_edge(first_parent, first_child)
+        self.network.add_edge(second_parent, second_child)
+        self.network.preprocess()
+
+    def assertSharedTableUsed(self, results):
+        for name in ['C1', 'C2']:
+            self.assertAlmostEqual(results[name]['on'], 0.9, delta=TOLERANCE, msg=name)
+
+    def test_gibbs_default_backend(self):
+        self.assertSharedTableUsed(self.network.gibbs({'P1': 'x', 'P2': 'x'}, ['C1', 'C2'], N, seed=0))
+
+    def test_gibbs_python(self):
+        with mock.patch.object(bayesNetwork, 'gibbs_kernel', None):
+            self.assertSharedTableUsed(self.network.gibbs({'P1': 'x', 'P2': 'x'}, ['C1', 'C2'], N, seed=0))
+
+
+class TestPartialDistribution(unittest.TestCase):
+    def setUp(self):
+        # Conditional probability table has no row for parent value y
+        parent = Node(DiscreteDistribution({'x': 0.5, 'y': 0.5}), name='P')
+        child = Node(ConditionalDistribution([['x', 'a', 0.25], ['x', 'b', 0.75]]), name='C')
+        self.network = BayesNetwork()
+        self.network.add_nodes([parent, child])
+        self.network.add_edge(parent, child)
+        self.network.preprocess()
+
+    def check_backend(self):
+        for sampling in [self.network.gibbs, self.network.gibbs_block]:
+            results = sampling({'P': 'x'}, ['C'], N, seed=0)
+            self.assertAlmostEqual(results['C']['a'], 0.25, delta=TOLERANCE)
+            with self.assertRaisesRegex(KeyError, 'node C'):
+                sampling({}, ['C'], N, seed=0)
+
+    def test_default_backend(self):
+        self.check_backend()
+
+    def test_python(self):
+        with mock.patch.object(bayesNetwork, 'gibbs_kernel', None), \
+                mock.patch.object(bayesNetwork, 'gibbs_block_kernel', None):
+            self.check_backend()
+
+
+if __name__ == '__main__':
+    unittest.main()
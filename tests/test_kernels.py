@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+try:
+    import Cython
+except ImportError:
+    Cython = None
+
+PYX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'BayesNetwork', '_gibbs_cy.pyx')
+
+
+@unittest.skipIf(Cython is None, 'Cython is not installed')
+class TestCythonKernels(unittest.TestCase):
+    def test_no_performance_hints(self):
+        # Helpers called inside nogil loops, which may raise exceptions, acquire GIL on every call
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, '-m', 'cython', '-3', PYX_PATH, '-o', os.path.join(directory, '_gibbs_cy.c')],
+                capture_output=True, text=True
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn('performance hint', result.stdout + result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()